@@ -3,53 +3,61 @@
 
 from __future__ import annotations
 
-import argparse
+import collections
 import enum
+import functools
 import logging
 import os
 import platform
-import re
-import textwrap
+import stat
+import sys
+import types
 import typing
 from pathlib import Path
 
 if typing.TYPE_CHECKING:
+    # argparse is only imported when it's actually needed, see ``fast_parse_args``.
+    import argparse
+
     SubparserType: typing.TypeAlias = argparse._SubParsersAction[
         argparse.ArgumentParser
     ]
+    ArgsType: typing.TypeAlias = argparse.Namespace | types.SimpleNamespace
 
 
 # Taken from https://github.com/Rapptz/discord.py/blob/master/discord/utils.py with some minor modification.
 class ColorFormatter(logging.Formatter):
-    LEVEL_COLOURS = [
-        (logging.DEBUG, "\x1b[40;1m"),
-        (logging.INFO, "\x1b[34;1m"),
-        (logging.WARNING, "\x1b[33;1m"),
-        (logging.ERROR, "\x1b[31m"),
-        (logging.CRITICAL, "\x1b[41m"),
-    ]
-
-    FORMATS = {
-        level: logging.Formatter(
-            f"{colour}%(levelname)-8s\x1b[0m%(message)s",
-        )
-        for level, colour in LEVEL_COLOURS
+    LEVEL_COLOURS = {
+        logging.DEBUG: "\x1b[40;1m",
+        logging.INFO: "\x1b[34;1m",
+        logging.WARNING: "\x1b[33;1m",
+        logging.ERROR: "\x1b[31m",
+        logging.CRITICAL: "\x1b[41m",
     }
 
+    def __init__(self, colour: bool | None = None):
+        super().__init__("%(levelname)-8s%(message)s")
+        # By default, only colour the level names on a terminal, see setup_logging.
+        self.colour = sys.stderr.isatty() if colour is None else colour
+
     def format(self, record):
-        formatter = self.FORMATS.get(record.levelno)
-        if formatter is None:
-            formatter = self.FORMATS[logging.DEBUG]
+        if not self.colour:
+            return super().format(record)
+
+        colour = self.LEVEL_COLOURS.get(
+            record.levelno, self.LEVEL_COLOURS[logging.DEBUG]
+        )
+        output = f"{colour}{record.levelname:<8}\x1b[0m{record.getMessage()}"
 
         # Override the traceback to always print in red
-        if record.exc_info:
-            text = formatter.formatException(record.exc_info)
+        if record.exc_info and not record.exc_text:
+            text = self.formatException(record.exc_info)
             record.exc_text = f"\x1b[31m{text}\x1b[0m"
+        if record.exc_text:
+            output = f"{output}\n{record.exc_text}"
+        if record.stack_info:
+            output = f"{output}\n{self.formatStack(record.stack_info)}"
 
-        output = formatter.format(record)
-
-        # Remove the cache layer
-        record.exc_text = None
         return output
 
 
@@ -69,10 +77,37 @@ def color(msg: typing.Any, color: str) -> str:
     return f"{color}{msg}{Colors.RESET}"
 
 
-logger = logging.Logger("dotfiles", level=logging.INFO)
-handler = logging.StreamHandler()
-handler.setFormatter(ColorFormatter())
-logger.addHandler(handler)
+# The arrow between a dotfile and its target, this is printed for every file so only build it once.
+_ARROW = color("=>", Colors.BOLD_HIGH_BLACK)
+
+
+def disable_colors():
+    """Turns every colour into an empty string, so that ``color``, ``_ARROW`` and the f-strings
+    using ``Colors`` all produce plain text.
+    """
+    global _ARROW
+    for name in vars(Colors):
+        if name.isupper():
+            setattr(Colors, name, "")
+    _ARROW = color("=>", Colors.BOLD_HIGH_BLACK)
+
+
+# The handler is only attached once the arguments are parsed, see ``setup_logging``.
+logger = logging.getLogger("dotfiles")
+
+
+def setup_logging(verbose: bool = False, colour: bool | None = None):
+    # Decide on colour once. Output that isn't going to a terminal (e.g. CI logs) gets no escape codes at all.
+    if colour is None:
+        colour = sys.stderr.isatty()
+    if not colour:
+        disable_colors()
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(ColorFormatter(colour=colour))
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG if verbose else logging.INFO)
+    logger.propagate = False
 
 
 class Condition(enum.IntEnum):
@@ -82,23 +117,31 @@ class Condition(enum.IntEnum):
     default = 0
 
 
+# Condition members by name, including aliases like ``host``. Iterating Condition would skip the aliases.
+_COND_BY_NAME: dict[str, Condition] = dict(Condition.__members__)
+_COND_NAMES = tuple(_COND_BY_NAME)
+
+
 class Override(typing.NamedTuple):
     cond: Condition
     comp: str | None
     name: str
 
 
+# uname doesn't change during a run, so only ask for it once.
+_UNAME = platform.uname()
+_NODE = _UNAME.node
+_SYSTEM = _UNAME.system
+_IS_WSL = "WSL" in _UNAME.release
+
+
 def hostname_condition(comp: str | None):
-    res = platform.uname()
-    return comp == res.node
+    return comp == _NODE
 
 
 def os_condition(comp: str | None):
-    res = platform.uname()
     # Check if we are WSL first.
-    if "WSL" in res.release and comp == "WSL":
-        return True
-    return comp == res.system
+    return (_IS_WSL and comp == "WSL") or comp == _SYSTEM
 
 
 CONDITIONS_CALLABLE_MAP: dict[Condition, typing.Callable[[str | None], bool]] = {
@@ -108,13 +151,35 @@ CONDITIONS_CALLABLE_MAP: dict[Condition, typing.Callable[[str | None], bool]] =
     Condition.default: lambda _: True,
 }
 
-DOTFILES = Path(__file__).resolve().parent
+
+@functools.cache
+def evaluate_condition(cond: Condition, comp: str | None) -> bool:
+    """Evaluates a condition against the current system. Results are cached, since the same
+    ``cond.comp`` pair is usually shared by many override files.
+
+    Args:
+        cond (Condition): The condition to evaluate.
+        comp (str | None): The comparison for that condition.
+
+    Returns:
+        bool: Whether the condition matches this system.
+    """
+    return CONDITIONS_CALLABLE_MAP[cond](comp)
+
+
+_SELF = Path(__file__).resolve()
+DOTFILES = _SELF.parent
 HOME = Path.home()
 
-# A list of ignored file/directory names.
+# Paths are passed around as strings internally, these prefixes let them be re-rooted without going through pathlib.
+_DOTFILES_PREFIX = os.path.join(DOTFILES, "")
+_OVERRIDES_PREFIX = os.path.join(DOTFILES, "overrides", "")
+_HOME_PREFIX = os.path.join(HOME, "")
+
+# A list of ignored file/directory names, these are only checked at the top level of the dotfiles directory.
 # .git shouldn't be symlinked, and bin, overrides, and this script are special cased
 # pycache shouldn't be either, gitignore is local to this directory, readme is too.
-IGNORED_NAMES = [
+_IGNORED_NAMES = [
     ".git",
     "overrides",
     "bin",
@@ -124,28 +189,39 @@ IGNORED_NAMES = [
     ".venv",
     "venv",
 ]
-with open(".gitignore") as fp:
-    IGNORED_NAMES += fp.readlines()
-IGNORED_PATHS = [DOTFILES / Path(p) for p in IGNORED_NAMES]
+# Only plain names from the gitignore can be matched, patterns are ignored. Lines are stripped so that
+# ``/foo`` and ``foo/`` both match the name ``foo``.
+with open(DOTFILES / ".gitignore") as fp:
+    _IGNORED_NAMES += [
+        line.strip().strip("/")
+        for line in fp
+        if line.strip() and not line.startswith("#")
+    ]
+IGNORED_NAMES = frozenset(_IGNORED_NAMES)
 
-# This regex matches foo.bar@baz, where ``foo`` is a condition, ``bar`` is a comparison for that condition,
-# and baz is the file name. It also includes groups to extract these variables if applicable.
-CONDITIONAL_REGEX = re.compile(r"(?P<cond>[a-zA-Z]+)\.(?P<comp>[a-zA-Z]+)@(?P<name>.+)")
-VALID_CONDITIONS = ["os", "host", "hostname"]
-# This regex only matches default@name (case insensitive).
-DEFAULT_REGEX = re.compile(r"default@(?P<name>.+)", flags=re.I)
+# Override names are either default@name, or foo.bar@baz, where ``foo`` is a condition, ``bar`` is a comparison
+# for that condition, and baz is the file name. As a regex, this would be (case insensitive):
+#   ^(?:default@(?P<default_name>.+)|(?P<cond>[a-z]+)\.(?P<comp>[a-z]+)@(?P<name>.+))$
+# The grammar is simple enough that ``parse_override_name`` splits it with str.partition instead.
+VALID_CONDITIONS = frozenset(["os", "host", "hostname"])
 
 
-def get_relative_to_home(path: Path) -> Path:
+def get_relative_to_home(path: str) -> str:
     # turns /home/person/dotfiles/path to path/, then to /home/person/path
-    return HOME / path.relative_to(DOTFILES)
+    return _HOME_PREFIX + path[len(_DOTFILES_PREFIX) :]
 
 
-def get_relative_overrides_to_home(path: Path) -> Path:
+def get_relative_overrides_to_home(path: str) -> str:
     # turns /home/person/dotfiles/overrides/path to path/ then to /home/person/path
-    return HOME / path.relative_to(DOTFILES / "overrides")
+    return _HOME_PREFIX + path[len(_OVERRIDES_PREFIX) :]
 
 
+def _is_ascii_word(text: str) -> bool:
+    # Equivalent to matching [a-zA-Z]+
+    return text.isascii() and text.isalpha()
+
+
+@functools.lru_cache(maxsize=None)
 def parse_override_name(name: str) -> Override:
     """Parses a given file name into 3 strings: the condition (if applicable), the comparison for that condition, and the real name.
     The syntax for the condition (if applicable) should be ``cond.Comp@name`` or ``default@name``. Files can contain an ``@`` in their filename
@@ -159,10 +235,12 @@ def parse_override_name(name: str) -> Override:
             the second being the parsed conditional to compare to, and the third being the parsed file name.
             If ``default`` is parsed out, element 2 will be ``None``.
     """
-    if match := DEFAULT_REGEX.match(name):
-        return Override(Condition["default"], None, match.group("name"))
-    elif match := CONDITIONAL_REGEX.match(name):
-        cond: str = match.group("cond").lower()
+    prefix, _, real_name = name.partition("@")
+    cond, dot, comp = prefix.partition(".")
+    if real_name and prefix.lower() == "default":
+        return Override(_COND_BY_NAME["default"], None, real_name)
+    elif real_name and dot and _is_ascii_word(cond) and _is_ascii_word(comp):
+        cond = cond.lower()
         if cond not in VALID_CONDITIONS:
             logger.error(
                 "encountered invalid condition when parsing conditions from %s: %s",
@@ -171,175 +249,225 @@ def parse_override_name(name: str) -> Override:
             )
             logger.error("assuming this was an error and exiting.")
             exit(1)
-        return Override(Condition[cond], match.group("comp"), match.group("name"))  # type: ignore : valid conditions were checked above.
+        return Override(_COND_BY_NAME[cond], comp, real_name)
     else:
         logger.error("could not find valid condition when parsing the file: %s", name)
         exit(1)
 
 
-def get_symlink_files() -> list[Path]:
-    """Gets the files that should be symlinked. This should be paths relative to the dotfiles directory
+def walk_files(
+    root: str | Path,
+    *,
+    ignored: frozenset[str] = frozenset(),
+) -> list[str]:
+    """Recursively collects the files under ``root``. Directories are never returned, only descended into.
+    This uses ``os.scandir`` so that the file type comes from the directory listing instead of a ``stat`` per entry.
+    If ``root`` doesn't exist, nothing is returned.
+
+    Args:
+        root (str | Path): The directory to walk.
+        ignored (frozenset[str]): Names to skip, only checked for the direct children of ``root``.
 
     Returns:
-        list[Path]: The list of files.
+        list[str]: The list of file paths.
     """
-    paths: list[Path] = []
-
-    for file in DOTFILES.glob("**/*"):
-        if (
-            file.is_dir()
-            or file in IGNORED_PATHS
-            or any(parent in IGNORED_PATHS for parent in file.parents)
-        ):
+    paths: list[str] = []
+    top = os.fspath(root)
+    directories: collections.deque[str] = collections.deque([top])
+
+    while directories:
+        directory = directories.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
             continue
-        paths.append(file)
+        with entries:
+            for entry in entries:
+                if directory == top and entry.name in ignored:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                elif not entry.is_dir():
+                    # Symlinks to directories are neither followed nor linked themselves.
+                    paths.append(entry.path)
 
     return paths
 
 
-def get_override_files() -> list[Path]:
+@functools.cache
+def get_symlink_files() -> list[str]:
+    """Gets the files that should be symlinked. This should be paths relative to the dotfiles directory.
+    The walk is only done once per run, the result is cached and shouldn't be modified.
+
+    Returns:
+        list[str]: The list of file paths.
+    """
+    return walk_files(DOTFILES, ignored=IGNORED_NAMES)
+
+
+@functools.cache
+def get_override_files() -> list[tuple[str, Override]]:
     """Get the override files to symlink. These are parsed and validated, then the best fit is picked.
     The best fit is ranked as follows (1 is the best fit):
     1. Hostname
     2. OS
     3. Default
     If there 2 matches, this will error and exit.
+    Like ``get_symlink_files``, the result is cached and shouldn't be modified.
 
     Returns:
-        list[Path]: A list of path objects to symlink.
+        list[tuple[str, Override]]: A list of paths to symlink, along with their parsed override.
     """
-    file_overrides: dict[Path, list[tuple[Path, Override]]] = {}
-    for path in DOTFILES.glob("overrides/**/*"):
-        if path.is_dir():
+    # The best candidate found so far for each file. Nothing can outrank a candidate with an equal or higher
+    # condition, so those are skipped without evaluating their condition (a hostname match ends the search).
+    # Ties go to whichever candidate was found first.
+    best: dict[str, tuple[str, Override]] = {}
+    for path in walk_files(DOTFILES / "overrides"):
+        parent, name = os.path.split(path)
+        overrides = parse_override_name(name)
+        normalized_file = os.path.join(parent, overrides.name)
+
+        current = best.get(normalized_file)
+        if current is not None and overrides.cond <= current[1].cond:
             continue
-        overrides = parse_override_name(path.name)
-        normalized_file = path.parent / overrides.name
-        if normalized_file in file_overrides:
-            file_overrides[normalized_file].append((path, overrides))
-        else:
-            file_overrides[normalized_file] = [(path, overrides)]
-
-    symlinks = []
-    for path, overrides in file_overrides.items():
-        # Initialize our best pick.
-        best, best_overrides = None, None
-        for f, f_overrides in overrides:
-            if f_overrides.cond == Condition.default and best is None:
-                best = f
-                best_overrides = f_overrides
-                continue
-
-            condition = CONDITIONS_CALLABLE_MAP[f_overrides.cond](f_overrides.comp)
-
-            if condition and (
-                best_overrides is None or f_overrides.cond > best_overrides.cond
-            ):
-                best = f
-                best_overrides = f_overrides
-        if best:
-            symlinks.append(best)
-
-    return symlinks
-
-
-def symlink_file(original: Path, to: Path, *, overwrite: str = "a"):
-    if to.exists(follow_symlinks=False) and to.resolve() != original:
-        # set the level based off of if we are ignoring or not.
-        logger.warning(
-            "attempted to symlink to path that existed and wasn't symlinked to us: %s (original: %s)",
-            to,
-            original,
+        if evaluate_condition(overrides.cond, overrides.comp):
+            best[normalized_file] = (path, overrides)
+
+    return list(best.values())
+
+
+def iter_managed_files(
+    *, regular: bool = True, overrides: bool = True
+) -> typing.Iterator[tuple[str, str, bool]]:
+    """Iterates over the managed files along with where they should be linked to, so callers don't
+    need to handle regular files and overrides separately.
+
+    Args:
+        regular (bool): Whether to include the regular files (anything not in overrides/).
+        overrides (bool): Whether to include the best fit override files.
+
+    Yields:
+        tuple[str, str, bool]: The file in the dotfiles directory, the path it should be linked to,
+            and whether it is an override.
+    """
+    # Collect both lists before yielding, so an invalid override name exits before any file is touched.
+    symlink_files = get_symlink_files() if regular else []
+    override_files = get_override_files() if overrides else []
+
+    for file in symlink_files:
+        yield file, get_relative_to_home(file), False
+
+    for file, override in override_files:
+        real_path = get_relative_overrides_to_home(
+            os.path.join(os.path.dirname(file), override.name)
         )
-        should_overwrite = False
-        if overwrite in ["a", "ask"]:
-            res = input("Overwrite (Y/n)? ")
-            should_overwrite = res.upper() == "Y"
-        elif overwrite in ["y", "yes"]:
-            should_overwrite = True
-        else:
-            should_overwrite = False
-        if should_overwrite:
-            logger.info("overwriting %s", color(to, Colors.CYAN_BACKGROUND))
-            to.unlink()
-            to.symlink_to(original)
-        else:
-            logger.info("skipping...")
+        yield file, real_path, True
+
+
+def _is_same_file(a: str, b: str) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        # Broken links and the like can't be the same file.
+        return False
 
-    elif not to.exists(follow_symlinks=False):
-        if not to.parent.exists():
-            to.parent.mkdir(parents=True)
 
-        to.symlink_to(original)
+def symlink_file(original: str | Path, to: str | Path, *, overwrite: str = "a"):
+    original, to = os.fspath(original), os.fspath(to)
+
+    # A single lstat tells us whether there's anything there, and whether it's a symlink worth reading.
+    try:
+        st = os.lstat(to)
+    except FileNotFoundError:
+        try:
+            os.symlink(original, to)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(to), exist_ok=True)
+            os.symlink(original, to)
         logger.info(
             "successfully symlinked %s to %s.",
-            color(str(to), Colors.CYAN_BACKGROUND),
-            color(str(original), Colors.CYAN_BACKGROUND),
+            color(to, Colors.CYAN_BACKGROUND),
+            color(original, Colors.CYAN_BACKGROUND),
         )
-    else:
+        return
+
+    # The link we would have made is the common case. Otherwise, check whether the target still ends up at
+    # the original, e.g. a relative link, or a file under a directory that is itself linked into the dotfiles.
+    # Overwriting the latter would delete the dotfile.
+    already_linked = stat.S_ISLNK(st.st_mode) and os.readlink(to) == original
+    if already_linked or _is_same_file(to, original):
         logger.info(
             "file %s already existed, skipping.",
-            color(str(to.relative_to(HOME)), Colors.CYAN_BACKGROUND),
+            color(os.path.relpath(to, HOME), Colors.CYAN_BACKGROUND),
         )
+        return
+
+    # set the level based off of if we are ignoring or not.
+    logger.warning(
+        "attempted to symlink to path that existed and wasn't symlinked to us: %s (original: %s)",
+        to,
+        original,
+    )
+    should_overwrite = False
+    if overwrite in ["a", "ask"]:
+        res = input("Overwrite (Y/n)? ")
+        should_overwrite = res.upper() == "Y"
+    elif overwrite in ["y", "yes"]:
+        should_overwrite = True
+    else:
+        should_overwrite = False
+    if should_overwrite:
+        logger.info("overwriting %s", color(to, Colors.CYAN_BACKGROUND))
+        os.unlink(to)
+        os.symlink(original, to)
+    else:
+        logger.info("skipping...")
 
 
 def symlink_bin_and_self(overwrite: str = "a"):
-    for file in (DOTFILES / "bin").iterdir():
-        real_path = HOME / ".local" / file.relative_to(DOTFILES)
-        if not real_path.parent.exists():
-            real_path.parent.mkdir(parents=True)
-        symlink_file(file, real_path, overwrite=overwrite)
+    bin_dir = os.path.join(HOME, ".local", "bin")
+    with os.scandir(DOTFILES / "bin") as entries:
+        for entry in entries:
+            # symlink_file creates the parent directory if needed.
+            symlink_file(
+                entry.path, os.path.join(bin_dir, entry.name), overwrite=overwrite
+            )
 
     # Symlink the self binary.
-    symlink_file(
-        Path(__file__).resolve(), HOME / ".local/bin/dotfiles", overwrite=overwrite
-    )
+    symlink_file(_SELF, os.path.join(bin_dir, "dotfiles"), overwrite=overwrite)
 
 
-def cli(parser: argparse.ArgumentParser, args: argparse.Namespace):
-    parser.print_help()
+def cli(parser: argparse.ArgumentParser | None, args: ArgsType):
+    (parser or setup_parser()).print_help()
 
 
-def cli_apply(parser: argparse.ArgumentParser, args: argparse.Namespace):
+def cli_apply(parser: argparse.ArgumentParser | None, args: ArgsType):
     action: str = args.action
     dry: bool = args.dry
     overwrite: str = args.overwrite
-    files = []
-    override_files = []
-    if action in ["regular", "all"]:
-        files = get_symlink_files()
-    if action in ["override", "all"]:
-        override_files = get_override_files()
-
-    for file in files:
-        real_path = get_relative_to_home(file)
-        if not dry:
-            symlink_file(file, real_path, overwrite=overwrite)
-        else:
-            logger.info(
-                "%s %s %s",
-                color(str(file.absolute()), Colors.CYAN_BACKGROUND),
-                color("=>", Colors.BOLD_HIGH_BLACK),
-                color(str(real_path.absolute()), Colors.CYAN_BACKGROUND),
-            )
+    managed_files = iter_managed_files(
+        regular=action in ["regular", "all"],
+        overrides=action in ["overrides", "all"],
+    )
 
-    for file in override_files:
-        overrides = parse_override_name(file.name)
-        real_path = get_relative_overrides_to_home(file.parent / overrides.name)
+    for file, real_path, is_override in managed_files:
         if not dry:
             symlink_file(file, real_path, overwrite=overwrite)
-        else:
+        elif logger.isEnabledFor(logging.INFO):
+            # Don't build the coloured strings if nothing would be printed.
+            colour = Colors.CYAN if is_override else Colors.CYAN_BACKGROUND
             logger.info(
                 "%s %s %s",
-                color(str(file.absolute()), Colors.CYAN),
-                color("=>", Colors.BOLD_HIGH_BLACK),
-                color(str(real_path.absolute()), Colors.CYAN),
+                f"{colour}{file}{Colors.RESET}",
+                _ARROW,
+                f"{colour}{real_path}{Colors.RESET}",
             )
 
     if action in ["all", "regular"] and not dry:
         symlink_bin_and_self(overwrite=overwrite)
 
 
-def cli_add(parser: argparse.ArgumentParser, args: argparse.Namespace):
+def cli_add(parser: argparse.ArgumentParser | None, args: ArgsType):
     file: Path = args.add
     dry: bool = args.dry
     if not file.is_file() or file.is_symlink():
@@ -363,7 +491,7 @@ def cli_add(parser: argparse.ArgumentParser, args: argparse.Namespace):
     )
 
 
-def cli_remove(parser: argparse.ArgumentParser, args: argparse.Namespace):
+def cli_remove(parser: argparse.ArgumentParser | None, args: ArgsType):
     file: Path = args.remove
     dry: bool = args.dry
     if file.is_dir():
@@ -373,7 +501,7 @@ def cli_remove(parser: argparse.ArgumentParser, args: argparse.Namespace):
         file = Path.cwd() / file
     if file.is_relative_to(DOTFILES):
         real_file = file
-        file = get_relative_to_home(file)
+        file = Path(get_relative_to_home(str(file)))
 
     if file.is_symlink():
         real_file = file.resolve()
@@ -386,7 +514,7 @@ def cli_remove(parser: argparse.ArgumentParser, args: argparse.Namespace):
         )
         exit(1)
 
-    logger.debug("The real file is %s and the symlink is %s", str(real_file), str(file))
+    logger.debug("The real file is %s and the symlink is %s", real_file, file)
 
     if not dry:
         file.unlink()
@@ -394,48 +522,56 @@ def cli_remove(parser: argparse.ArgumentParser, args: argparse.Namespace):
     logger.info("File removed from dotfiles.")
 
 
-def cli_status(parser: argparse.ArgumentParser, args: argparse.Namespace):
-    linked: list[tuple[Path, Path]] = []
-    not_linked: list[tuple[Path, Path]] = []
-    for file in get_symlink_files():
-        real_path = get_relative_to_home(file)
-        if not real_path.exists():
-            not_linked.append((file, real_path))
-        else:
-            linked.append((file, real_path))
+def cli_status(parser: argparse.ArgumentParser | None, args: ArgsType):
+    # Group the targets by their directory so each directory is listed once, rather than stat-ing every file.
+    targets_by_parent: collections.defaultdict[str, list[tuple[str, str]]] = (
+        collections.defaultdict(list)
+    )
+    for file, real_path, _ in iter_managed_files():
+        targets_by_parent[os.path.dirname(real_path)].append((file, real_path))
+
+    linked: list[tuple[str, str]] = []
+    not_linked: list[tuple[str, str]] = []
+    for parent, targets in targets_by_parent.items():
+        try:
+            entries = set(os.listdir(parent))
+        except (FileNotFoundError, NotADirectoryError):
+            entries = set()
+        for file, real_path in targets:
+            if os.path.basename(real_path) in entries:
+                linked.append((file, real_path))
+            else:
+                not_linked.append((file, real_path))
 
-    for file in get_override_files():
-        overrides = parse_override_name(file.name)
-        real_path = get_relative_overrides_to_home(file.parent / overrides.name)
-        if not real_path.exists(follow_symlinks=False):
-            not_linked.append((file, real_path))
-        else:
-            linked.append((file, real_path))
+    if not linked and not not_linked:
+        return
 
+    # Only query the terminal once, and only if there is something to print.
+    separator = "=" * (os.get_terminal_size().columns - 8)
     if linked:
-        logger.info("=" * (os.get_terminal_size().columns - 8))
+        logger.info(separator)
         logger.info("Managed: ")
         for file, real_path in linked:
             logger.info(
                 "%s %s %s",
-                color(str(file.absolute()), Colors.GREEN),
-                color("=>", Colors.BOLD_HIGH_BLACK),
-                color(str(real_path.absolute()), Colors.GREEN),
+                f"{Colors.GREEN}{file}{Colors.RESET}",
+                _ARROW,
+                f"{Colors.GREEN}{real_path}{Colors.RESET}",
             )
     if not_linked:
         print()
-        logger.info("=" * (os.get_terminal_size().columns - 8))
+        logger.info(separator)
         logger.info("Unmanaged: ")
         for file, real_path in not_linked:
             logger.info(
                 "%s %s %s",
-                color(str(file.absolute()), Colors.RED),
-                color("=>", Colors.BOLD_HIGH_BLACK),
-                color(str(real_path.absolute()), Colors.RED),
+                f"{Colors.RED}{file}{Colors.RESET}",
+                _ARROW,
+                f"{Colors.RED}{real_path}{Colors.RESET}",
             )
 
 
-def cli_test(parser: argparse.ArgumentParser, args: argparse.Namespace):
+def cli_test(parser: argparse.ArgumentParser | None, args: ArgsType):
     expressions: list[str] = args.expression
     # first, check if the expression is even valid.
     # this doesn't need regex: expressions are just cond.comp, so split by ``.``
@@ -443,18 +579,18 @@ def cli_test(parser: argparse.ArgumentParser, args: argparse.Namespace):
         split = expr.split(".")
         if len(split) == 2:
             condition_str, comparison = split
-            if condition_str not in Condition.__members__.keys():
+            if condition_str not in _COND_BY_NAME:
                 logger.error(
                     "the given condition %s was not valid, the valid keys are: %s",
                     condition_str,
-                    ", ".join(Condition.__members__.keys()),
+                    ", ".join(_COND_NAMES),
                 )
             else:
                 logger.info(
                     "is %s? %s",
                     expr,
                     color(
-                        CONDITIONS_CALLABLE_MAP[Condition[condition_str]](comparison),
+                        evaluate_condition(_COND_BY_NAME[condition_str], comparison),
                         Colors.CYAN_BACKGROUND,
                     ),
                 )
@@ -468,7 +604,88 @@ def cli_test(parser: argparse.ArgumentParser, args: argparse.Namespace):
                 logger.error("the given expression %s was invalid.", expr)
 
 
+# The flags and choices the subcommands accept, shared between argparse and ``fast_parse_args``.
+VERBOSE_FLAGS = frozenset(["-v", "--verbose", "--debug"])
+DRY_FLAGS = {
+    "apply": frozenset(["-d", "--dry", "--dry-run"]),
+    "add": frozenset(["-d", "--dry", "--dry-run"]),
+    "remove": frozenset(["-d", "--dry", "--dry-run"]),
+    "rm": frozenset(["-d", "--dry", "--dry-run"]),
+    "test": frozenset(["-d", "--dry-run"]),
+}
+OVERWRITE_FLAGS = frozenset(["-o", "--overwrite", "--overwrite-symlinks"])
+OVERWRITE_CHOICES = ["y", "yes", "n", "no", "a", "ask"]
+APPLY_ACTIONS = ["all", "overrides", "regular"]
+
+
+def fast_parse_args(argv: list[str]) -> types.SimpleNamespace | None:
+    """Parses the common invocations by hand, so that they don't have to import and build the argparse parser.
+    Anything this doesn't understand, such as ``--help`` or invalid arguments, is left to argparse.
+
+    Args:
+        argv (list[str]): The arguments, without the program name.
+
+    Returns:
+        types.SimpleNamespace | None: The parsed arguments, with the same attributes argparse would set,
+            or ``None`` if argparse should handle them instead.
+    """
+    if not argv:
+        return None
+
+    command, *rest = argv
+    dry_flags = DRY_FLAGS.get(command, frozenset())
+    verbose = dry = False
+    overwrite = "a"
+    positionals: list[str] = []
+
+    arguments = iter(rest)
+    for arg in arguments:
+        if arg in VERBOSE_FLAGS:
+            verbose = True
+        elif arg in dry_flags:
+            dry = True
+        elif command == "apply" and arg in OVERWRITE_FLAGS:
+            overwrite = next(arguments, "")
+            if overwrite not in OVERWRITE_CHOICES:
+                return None
+        elif arg.startswith("-"):
+            return None
+        else:
+            positionals.append(arg)
+
+    if command == "apply" and len(positionals) <= 1:
+        action = positionals[0] if positionals else "all"
+        if action not in APPLY_ACTIONS:
+            return None
+        return types.SimpleNamespace(
+            func=cli_apply,
+            action=action,
+            dry=dry,
+            overwrite=overwrite,
+            verbose=verbose,
+        )
+    elif command == "add" and len(positionals) == 1:
+        return types.SimpleNamespace(
+            func=cli_add, add=Path(positionals[0]), dry=dry, verbose=verbose
+        )
+    elif command in ["remove", "rm"] and len(positionals) == 1:
+        return types.SimpleNamespace(
+            func=cli_remove, remove=Path(positionals[0]), dry=dry, verbose=verbose
+        )
+    elif command == "status" and not positionals:
+        return types.SimpleNamespace(func=cli_status, status=True, verbose=verbose)
+    elif command == "test" and positionals:
+        return types.SimpleNamespace(
+            func=cli_test, expression=positionals, dry_run=dry, verbose=verbose
+        )
+
+    return None
+
+
 def add_apply_args(subparser: SubparserType):
+    import argparse
+    import textwrap
+
     parser = subparser.add_parser(
         "apply",
         help="Run the process to symlink the dotfiles",
@@ -479,14 +696,14 @@ def add_apply_args(subparser: SubparserType):
         "-o",
         "--overwrite",
         "--overwrite-symlinks",
-        choices=["y", "yes", "n", "no", "a", "ask"],
+        choices=OVERWRITE_CHOICES,
         dest="overwrite",
         help="Whether to overwrite a file if it is already present and not managed by the script. The default is (a)sk.",
         default="a",
     )
     parser.add_argument(
         "action",
-        choices=["all", "overrides", "regular"],
+        choices=APPLY_ACTIONS,
         help=textwrap.dedent(
             """
             all - Applies all of the dotfiles (overrides and regular). [DEFAULT]
@@ -566,6 +783,8 @@ def add_test_args(subparser: SubparserType):
 
 
 def setup_parser():
+    import argparse
+
     parser = argparse.ArgumentParser(prog="dotfiles", description="Dotfiles helper")
     subparser = parser.add_subparsers(title="subcommands", metavar="")
     parser.set_defaults(func=cli)
@@ -591,14 +810,16 @@ def setup_parser():
 
 
 def main():
-    parser = setup_parser()
-
-    args = parser.parse_args()
+    # Most invocations are simple, so try to parse them by hand before paying for argparse.
+    parser = None
+    args = fast_parse_args(sys.argv[1:])
+    if args is None:
+        parser = setup_parser()
+        args = parser.parse_args()
 
     # Not my favorite way to do this, but when invoking w/o subcommand we want to print help
     # But we also don't take verbose because it won't do anything.
-    if getattr(args, "verbose", False):
-        logger.setLevel(logging.DEBUG)
+    setup_logging(getattr(args, "verbose", False))
 
     logger.debug("running with args %s", args)
 